@@ -11,14 +11,22 @@ app.py - Streamlit LinkedIn Article Poster (single-file)
 from __future__ import annotations
 import os
 import sys
+import io
+import hashlib
+import collections
+import threading
 import time
 import json
-import textwrap
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional, Dict, Any
 
 import streamlit as st
-from streamlit.components.v1 import html as st_html
-from dotenv import load_dotenv
+# Not part of Streamlit's public API; known to work on the 1.37-1.x range pinned in requirements.txt.
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from tenacity import Retrying, retry_if_exception_type, stop_any, stop_after_attempt, wait_exponential_jitter
+
+if TYPE_CHECKING:
+    import requests
 
 # Optional: the app will try to import linkedin_poster_core.py if present.
 try:
@@ -27,15 +35,41 @@ try:
 except Exception:
     BACKEND_MODULE = False
 
-# Try to import the Gemini client (google.generativeai). Be graceful if missing.
+# Optional: orjson (C) for the LinkedIn JSON bodies; falls back to the stdlib json module.
 try:
-    import google.generativeai as genai  # type: ignore
-    GENAI_AVAILABLE = True
+    import orjson  # type: ignore
+    ORJSON_AVAILABLE = True
 except Exception:
-    genai = None
-    GENAI_AVAILABLE = False
-
-import requests
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+def json_loads(data: bytes) -> Any:
+    """Parse a JSON body; raises ValueError on invalid input with either backend."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# The Gemini client (google.generativeai) pulls in grpc/protobuf, so it is imported
+# lazily by _get_genai() on first use. GENAI_AVAILABLE stays None until then.
+genai = None
+GENAI_AVAILABLE: Optional[bool] = None
+
+def _get_genai():
+    """Import google.generativeai once; return the module, or None if it is missing."""
+    global genai, GENAI_AVAILABLE
+    if GENAI_AVAILABLE is None:
+        try:
+            import google.generativeai as _genai  # type: ignore
+            genai = _genai
+            GENAI_AVAILABLE = True
+        except Exception:
+            GENAI_AVAILABLE = False
+    return genai
 
 # Constants
 LINKEDIN_API_BASE = "https://api.linkedin.com/v2"
@@ -43,186 +77,244 @@ ORGS_ENDPOINT = f"{LINKEDIN_API_BASE}/organizationalEntityAcls?q=roleAssignee&st
 UGC_POSTS_ENDPOINT = f"{LINKEDIN_API_BASE}/ugcPosts"
 MAX_LINKEDIN_COMMENTARY_LENGTH = 3000
 DEFAULT_MODEL = "gemini-pro-latest"
+GEMINI_DEADLINE_SECONDS = 20
+GEMINI_MIN_ATTEMPT_SECONDS = 1.0
+
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """Shared HTTP session (pooled keep-alive connections, retries on throttling/5xx).
+
+    Cached as a resource so the pool survives Streamlit reruns. POSTs are not retried.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 
-# Tailwind hero (Play CDN) - for a nicer header (dev only)
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+    return session
+
+def _warm_linkedin(session) -> None:
+    try:
+        session.head("https://api.linkedin.com/", timeout=5)
+    except Exception:
+        pass
+
+@st.cache_resource(show_spinner=False)
+def start_linkedin_warmup() -> threading.Thread:
+    """Resolve DNS and complete the TLS handshake to LinkedIn in the background, once per process."""
+    thread = threading.Thread(target=_warm_linkedin, args=(get_http_session(),), name="linkedin-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# Tailwind-style hero. Only the utility classes used below are shipped, pre-built as
+# static CSS scoped to .lap-hero, so no Play CDN download or in-browser JIT per rerun.
+# Rendered inline with st.markdown rather than a components iframe, so reruns do not
+# rebuild and reload an iframe document.
 TAILWIND_HEADER = """
-<script src="https://cdn.tailwindcss.com"></script>
-<div class="bg-gradient-to-r from-indigo-600 via-purple-600 to-pink-500 p-6 rounded-b-2xl text-white">
-  <div class="max-w-6xl mx-auto flex items-center gap-4">
-    <div class="flex-shrink-0">
-      <div class="w-14 h-14 bg-white/20 rounded-lg flex items-center justify-center text-2xl font-bold">AI</div>
-    </div>
-    <div>
-      <h1 class="text-2xl font-semibold">LinkedIn Article Poster</h1>
-      <p class="text-sm opacity-90">Generate professional articles with Gemini and publish to your LinkedIn Organization — visually and safely.</p>
+<style>
+  .lap-hero { font-family: ui-sans-serif, system-ui, -apple-system, "Segoe UI", Roboto, sans-serif; }
+  .lap-hero .bg-gradient-to-r { background-image: linear-gradient(to right, #4f46e5, #9333ea, #ec4899); }
+  .lap-hero .p-6 { padding: 1.5rem; }
+  .lap-hero .rounded-b-2xl { border-bottom-left-radius: 1rem; border-bottom-right-radius: 1rem; }
+  .lap-hero .text-white { color: #fff; }
+  .lap-hero .max-w-6xl { max-width: 72rem; }
+  .lap-hero .mx-auto { margin-left: auto; margin-right: auto; }
+  .lap-hero .flex { display: flex; }
+  .lap-hero .items-center { align-items: center; }
+  .lap-hero .justify-center { justify-content: center; }
+  .lap-hero .gap-4 { gap: 1rem; }
+  .lap-hero .flex-shrink-0 { flex-shrink: 0; }
+  .lap-hero .w-14 { width: 3.5rem; }
+  .lap-hero .h-14 { height: 3.5rem; }
+  .lap-hero .bg-white\\/20 { background-color: rgba(255, 255, 255, 0.2); }
+  .lap-hero .rounded-lg { border-radius: 0.5rem; }
+  .lap-hero .text-2xl { font-size: 1.5rem; line-height: 2rem; }
+  .lap-hero .text-sm { font-size: 0.875rem; line-height: 1.25rem; }
+  .lap-hero .font-bold { font-weight: 700; }
+  .lap-hero .font-semibold { font-weight: 600; }
+  .lap-hero .opacity-90 { opacity: 0.9; }
+</style>
+<div class="lap-hero">
+  <div class="bg-gradient-to-r p-6 rounded-b-2xl text-white">
+    <div class="max-w-6xl mx-auto flex items-center gap-4">
+      <div class="flex-shrink-0">
+        <div class="w-14 h-14 bg-white/20 rounded-lg flex items-center justify-center text-2xl font-bold">AI</div>
+      </div>
+      <div>
+        <div class="text-2xl font-semibold">LinkedIn Article Poster</div>
+        <div class="text-sm opacity-90">Generate professional articles with Gemini and publish to your LinkedIn Organization — visually and safely.</div>
+      </div>
     </div>
   </div>
 </div>
 """
 
-st.set_page_config(page_title="LinkedIn Article Poster", layout="wide")
-st_html(TAILWIND_HEADER, height=110)
-
-# Layout
-left_col, right_col = st.columns([1, 2])
-
-with left_col:
-    st.header("Article settings")
-
-    prompt = st.text_area(
-        "Article prompt",
-        value=(
-            "Generate a professional and engaging article about the benefits of adopting cloud-native "
-            "technologies for enterprise businesses. The article should be approximately 500 words, "
-            "include a strong introduction and conclusion, and focus on scalability, cost efficiency, "
-            "innovation, and developer experience."
-        ),
-        height=180,
-    )
-
-    model = st.selectbox("Model", options=[DEFAULT_MODEL, "gemini-1.0-mini"], index=0)
-
-    st.subheader("LinkedIn settings")
-    org_id_override = st.text_input("Organization ID (optional)", help="Numeric org id overrides auto-detection")
-
-    st.subheader("API Keys (session only)")
-    st.markdown("Enter your API keys below. Keys are kept only in this session and are not saved to disk.")
-    gemini_key = st.text_input("Gemini API Key", type="password", placeholder="Paste your GEMINI_API_KEY here (session only)")
-    linkedin_key = st.text_input("LinkedIn API Key (Bearer token)", type="password", placeholder="Paste your LINKEDIN_API_KEY here (session only)")
-
-    st.subheader("Output options")
-    save_path = st.text_input("Save generated article to file (optional)", value="article.txt")
-    dry_run = st.checkbox("Dry run (do not post to LinkedIn)", value=True)
-
-    st.markdown("---")
-    st.caption("Backend status:")
-    if BACKEND_MODULE:
-        st.success("Found linkedin_poster_core.py — will try to use it.")
-    else:
-        st.info("No backend module found — app will use its internal generator/poster or mocks.")
-
-    generate_btn = st.button("Generate Article", use_container_width=True)
-    publish_disabled = dry_run or (not linkedin_key)
-    post_btn = st.button("Publish to LinkedIn", use_container_width=True, disabled=publish_disabled)
-
-with right_col:
-    st.header("Preview")
-    preview_area = st.empty()
-    st.markdown("---")
-    st.header("Activity / Logs")
-    log_area = st.empty()
-
-# Session state setup
-if "generated_article" not in st.session_state:
-    st.session_state.generated_article = ""
-if "logs" not in st.session_state:
-    st.session_state.logs = []
-if "gemini_key" not in st.session_state:
-    st.session_state.gemini_key = gemini_key or ""
-if "linkedin_key" not in st.session_state:
-    st.session_state.linkedin_key = linkedin_key or ""
-
-def append_log(msg: str):
-    st.session_state.logs.append(msg)
-    log_area.text_area("Logs", value="\n".join(st.session_state.logs[-100:]), height=220)
-
 # Mock article for fallback/demo
-MOCK_ARTICLE = textwrap.dedent(
-    """
-    Introduction
-
-    Cloud-native technologies are transforming how enterprises design, deploy, and operate software...
-    (This is a placeholder article used when Gemini is not available.)
-    """
-).strip()
+MOCK_ARTICLE = (
+    "Introduction\n"
+    "\n"
+    "Cloud-native technologies are transforming how enterprises design, deploy, and operate software...\n"
+    "(This is a placeholder article used when Gemini is not available.)"
+)
 
 # ---------- Backend helpers (inlined) ----------
 
 def configure_gemini_session(api_key: str):
     """Configure google.generativeai client if available."""
-    if not GENAI_AVAILABLE:
+    if _get_genai() is None:
         raise RuntimeError("google.generativeai is not installed. Install it or use mock generation.")
     genai.configure(api_key=api_key)
 
+# Where generated text can live in a Gemini response (SDK object or plain dict), tried in
+# order. str steps are dict keys/attributes, int steps are indices. First non-blank string wins.
+_CANDIDATE_KEYS = ("candidates", "outputs", "choices")
+_TEXT_PATHS = (
+    ("text",),
+    ("content",),
+    *((key, 0, field) for key in _CANDIDATE_KEYS for field in ("output", "content", "text")),
+    *((key, 0) for key in _CANDIDATE_KEYS),
+    ("candidates", 0, "content", "parts", 0, "text"),
+)
+
+def _resolve_path(obj: Any, path: tuple) -> Any:
+    for step in path:
+        if isinstance(step, int):
+            if obj is None or isinstance(obj, (str, bytes, dict)):
+                return None
+            try:
+                obj = obj[step]
+            except (IndexError, KeyError, TypeError):
+                return None
+        elif isinstance(obj, dict):
+            obj = obj.get(step)
+        else:
+            obj = getattr(obj, step, None)
+        if obj is None:
+            return None
+    return obj
+
 def extract_text_from_gemini_response(resp: Any) -> Optional[str]:
-    try:
-        if hasattr(resp, "text") and isinstance(resp.text, str) and resp.text.strip():
-            return resp.text.strip()
-        if isinstance(resp, dict):
-            for key in ("text", "content"):
-                if key in resp and isinstance(resp[key], str) and resp[key].strip():
-                    return resp[key].strip()
-            candidates = resp.get("candidates") or resp.get("outputs") or resp.get("choices")
-            if isinstance(candidates, (list, tuple)) and candidates:
-                first = candidates[0]
-                if isinstance(first, dict):
-                    for k in ("output", "content", "text"):
-                        if k in first and isinstance(first[k], str) and first[k].strip():
-                            return first[k].strip()
-                if isinstance(first, str) and first.strip():
-                    return first.strip()
-        if hasattr(resp, "candidates"):
-            c = getattr(resp, "candidates")
-            if isinstance(c, (list, tuple)) and c:
-                first = c[0]
-                for attr in ("content", "output", "text"):
-                    if hasattr(first, attr):
-                        val = getattr(first, attr)
-                        if isinstance(val, str) and val.strip():
-                            return val.strip()
-    except Exception:
-        return None
+    for path in _TEXT_PATHS:
+        try:
+            val = _resolve_path(resp, path)
+        except Exception:
+            # e.g. the SDK's .text accessor raises when a response was blocked
+            continue
+        if isinstance(val, str):
+            val = val.strip()
+            if val:
+                return val
     return None
 
-def generate_article_with_gemini(prompt_text: str, model_name: str = DEFAULT_MODEL, api_key: Optional[str] = None, max_retries: int = 2) -> str:
+def _generate_fn(model_name: str) -> Callable[[str, float], Any]:
+    """Build the model and choose its generate call once per generation, not per retry attempt.
+
+    Deliberately not cached across generations: construction is cheap, and a model binds the
+    process-global genai client on its first call, so a long-lived instance could end up
+    holding another session's API key.
+    """
+    model = genai.GenerativeModel(model_name)
+    if hasattr(model, "generate_content"):
+        return lambda prompt_text, timeout: model.generate_content(prompt_text, request_options={"timeout": timeout})
+    # The legacy generate() API takes no per-request timeout.
+    return lambda prompt_text, timeout: model.generate(prompt_text)
+
+def _transient_gemini_errors() -> tuple:
+    """Errors worth retrying: HTTP 429/500/503/504 and local timeouts. Bad keys, invalid
+    arguments and blocked/empty responses fail the same way every time.
+
+    TooManyRequests and GatewayTimeout are the bases of ResourceExhausted and DeadlineExceeded,
+    so the REST transport's 429/504 mappings and the gRPC ones are both covered.
+    """
+    from google.api_core import exceptions as api_exceptions
+
+    return (
+        api_exceptions.TooManyRequests,
+        api_exceptions.InternalServerError,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.GatewayTimeout,
+        TimeoutError,
+    )
+
+def _call_gemini(generate: Callable[[str, float], Any], prompt_text: str, deadline_at: float) -> str:
+    # Bound each attempt by what is left of the overall budget.
+    remaining = max(deadline_at - time.monotonic(), GEMINI_MIN_ATTEMPT_SECONDS)
+    resp = generate(prompt_text, remaining)
+    out = extract_text_from_gemini_response(resp)
+    if out:
+        return out
+    raise ValueError("Could not extract text from Gemini response.")
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _cached_generate(prompt_text: str, model_name: str, max_retries: int = 2, deadline: float = GEMINI_DEADLINE_SECONDS) -> str:
+    """Call Gemini with jittered exponential backoff within `deadline` seconds overall.
+
+    Keyed on prompt + model only; the API key is configured by the caller.
+    """
+    deadline_at = time.monotonic() + deadline
+    backoff = wait_exponential_jitter(initial=1, max=8)
+
+    def spare() -> float:
+        # Budget left once the next attempt's minimum timeout is reserved.
+        return deadline_at - time.monotonic() - GEMINI_MIN_ATTEMPT_SECONDS
+
+    retryer = Retrying(
+        retry=retry_if_exception_type(_transient_gemini_errors()),
+        # Give up when another attempt would not fit; otherwise sleep no longer than the slack,
+        # so the retry still gets at least GEMINI_MIN_ATTEMPT_SECONDS before the deadline.
+        stop=stop_any(stop_after_attempt(max_retries + 1), lambda state: spare() < 0),
+        wait=lambda state: min(backoff(state), max(spare(), 0.0)),
+        reraise=True,
+    )
+    return retryer(_call_gemini, _generate_fn(model_name), prompt_text, deadline_at)
+
+def generate_article_with_gemini(prompt_text: str, model_name: str = DEFAULT_MODEL, api_key: Optional[str] = None, max_retries: int = 2, deadline: float = GEMINI_DEADLINE_SECONDS) -> str:
     """Attempt to generate via Gemini; fallback to mock if failing."""
-    if not GENAI_AVAILABLE:
+    if _get_genai() is None:
         raise RuntimeError("Gemini client not installed.")
     if api_key:
         configure_gemini_session(api_key)
-    attempt = 0
-    while attempt <= max_retries:
-        attempt += 1
-        try:
-            model = genai.GenerativeModel(model_name)
-            if hasattr(model, "generate_content"):
-                resp = model.generate_content(prompt_text)
-            else:
-                resp = model.generate(prompt_text)
-            out = extract_text_from_gemini_response(resp)
-            if out:
-                return out
-            raise ValueError("Could not extract text from Gemini response.")
-        except Exception as exc:
-            # on last attempt raise
-            if attempt > max_retries:
-                raise
-            time.sleep(1.0 * attempt)
-    # shouldn't reach here
-    raise RuntimeError("Unexpected generation failure.")
+    return _cached_generate(prompt_text, model_name, max_retries, deadline)
+
+_COMPACT_JSON = json.JSONEncoder(separators=(",", ":"))
+
+def dump_truncated(obj: Any, max_len: int) -> str:
+    """Serialize obj to compact JSON, stopping once max_len characters have been produced."""
+    buf = io.StringIO()
+    for chunk in _COMPACT_JSON.iterencode(obj):
+        buf.write(chunk)
+        if buf.tell() >= max_len:
+            break
+    return buf.getvalue()[:max_len]
 
 def safe_truncate(text: str, max_len: int = MAX_LINKEDIN_COMMENTARY_LENGTH) -> str:
     if len(text) <= max_len:
         return text
     return text[: max_len - 3].rstrip() + "..."
 
-def get_linkedin_org_id(headers: Dict[str, str]) -> Optional[str]:
-    try:
-        resp = requests.get(ORGS_ENDPOINT, headers=headers, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        elements = data.get("elements", [])
-        for el in elements:
-            org_urn = el.get("organizationalTarget") or el.get("organizationalTarget~")
-            if org_urn:
-                parts = org_urn.split(":")
-                return parts[-1]
-        return None
-    except Exception as e:
-        raise
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_linkedin_org_id(bearer_token: str) -> str:
+    """Resolve the first approved organization for a token (cached per token for an hour).
+
+    Raises instead of returning None so a "no organization" answer is never cached.
+    """
+    headers = {"Authorization": f"Bearer {bearer_token}", "X-Restli-Protocol-Version": "2.0.0"}
+    resp = get_http_session().get(ORGS_ENDPOINT, headers=headers, timeout=10)
+    resp.raise_for_status()
+    data = json_loads(resp.content)
+    elements = data.get("elements", [])
+    for el in elements:
+        org_urn = el.get("organizationalTarget") or el.get("organizationalTarget~")
+        if org_urn:
+            parts = org_urn.split(":")
+            return parts[-1]
+    raise RuntimeError("No organization found for token.")
 
 def build_ugc_payload(org_id: str, text: str) -> Dict[str, Any]:
-    truncated = safe_truncate(text, MAX_LINKEDIN_COMMENTARY_LENGTH)
+    # Most articles fit; only call into safe_truncate when there is something to cut.
+    truncated = text if len(text) <= MAX_LINKEDIN_COMMENTARY_LENGTH else safe_truncate(text, MAX_LINKEDIN_COMMENTARY_LENGTH)
     payload = {
         "author": f"urn:li:organization:{org_id}",
         "lifecycleState": "PUBLISHED",
@@ -242,20 +334,85 @@ def post_to_linkedin_api(payload: Dict[str, Any], bearer_token: str, timeout: in
         "X-Restli-Protocol-Version": "2.0.0",
         "Content-Type": "application/json",
     }
-    resp = requests.post(UGC_POSTS_ENDPOINT, headers=headers, json=payload, timeout=timeout)
+    resp = get_http_session().post(UGC_POSTS_ENDPOINT, headers=headers, data=json_dumps_bytes(payload), timeout=timeout)
     resp.raise_for_status()
     try:
-        return resp.json()
+        return json_loads(resp.content)
     except ValueError:
         return {"status_code": resp.status_code, "headers": dict(resp.headers)}
 
+st.set_page_config(page_title="LinkedIn Article Poster", layout="wide")
+st.markdown(TAILWIND_HEADER, unsafe_allow_html=True)
+
+# Session state setup
+if "generated_article" not in st.session_state:
+    st.session_state.generated_article = ""
+if "logs" not in st.session_state:
+    st.session_state.logs = collections.deque(maxlen=100)
+if "gemini_key" not in st.session_state:
+    st.session_state.gemini_key = ""
+if "linkedin_key" not in st.session_state:
+    st.session_state.linkedin_key = ""
+
+def remember_linkedin_key(key: str):
+    """Store the LinkedIn token in session (org lookups are already cached per token)."""
+    st.session_state.linkedin_key = key or st.session_state.get("linkedin_key", "")
+
+def _file_signature(path: str) -> Optional[tuple]:
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_size, info.st_mtime_ns)
+
+def save_article(path: str, text: str) -> bool:
+    """Write the article in one shot; skip if this exact text was saved to path and the file is untouched since."""
+    digest = hashlib.blake2b(text.encode("utf-8")).digest()
+    last = st.session_state.get("_last_saved")
+    if last is not None and last[:2] == (path, digest) and last[2] == _file_signature(path):
+        return False
+    # Text mode keeps the platform's line endings (CRLF on Windows), as before.
+    Path(path).write_text(text, encoding="utf-8")
+    st.session_state._last_saved = (path, digest, _file_signature(path))
+    return True
+
+def prefetch_linkedin_org_id(token: str) -> threading.Thread:
+    """Warm get_linkedin_org_id's cache on a worker thread; Publish repeats and reports any failure.
+
+    A Publish that arrives mid-flight waits on st.cache_data's per-key compute lock rather than
+    issuing a second GET, so the thread needs no joining.
+    """
+    def run():
+        try:
+            get_linkedin_org_id(token)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run, name="linkedin-org-prefetch", daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return thread
+
+# Placeholders are (re)assigned by the workspace fragment on every run.
+preview_area = None
+log_area = None
+
+def append_log(msg: str):
+    st.session_state.logs.append(msg)
+    log_area.text_area("Logs", value="\n".join(st.session_state.logs), height=220)
+
 # ---------- Handlers (UI button logic) ----------
 
-if generate_btn:
+def handle_generate(prompt: str, model: str, gemini_key: str, linkedin_key: str, org_id_override: str, save_path: str):
     append_log("[info] Generation started...")
     # store keys in session (do not write to disk)
     st.session_state.gemini_key = gemini_key or st.session_state.get("gemini_key", "")
-    st.session_state.linkedin_key = linkedin_key or st.session_state.get("linkedin_key", "")
+    remember_linkedin_key(linkedin_key)
+
+    # Overlap the org-id lookup that Publish will need with the (much slower) generation.
+    uses_backend_poster = BACKEND_MODULE and hasattr(linkedin_poster_core, "post_to_linkedin")
+    if st.session_state.linkedin_key and not org_id_override and not uses_backend_poster:
+        prefetch_linkedin_org_id(st.session_state.linkedin_key)
 
     try:
         # Prefer a user-provided backend module if available
@@ -269,10 +426,11 @@ if generate_btn:
             append_log("[info] Generation completed using backend module.")
         else:
             # Use genai if available and key present; otherwise fallback to mock
-            if GENAI_AVAILABLE and st.session_state.gemini_key:
+            if st.session_state.gemini_key and _get_genai() is not None:
                 append_log("[info] Generating via Gemini (remote).")
                 try:
-                    article_text = generate_article_with_gemini(prompt, model, api_key=st.session_state.gemini_key)
+                    with st.spinner(f"Generating with {model} (gives up after about {GEMINI_DEADLINE_SECONDS}s)..."):
+                        article_text = generate_article_with_gemini(prompt, model, api_key=st.session_state.gemini_key)
                     append_log("[info] Gemini generation succeeded.")
                 except Exception as e:
                     append_log(f"[warn] Gemini generation failed: {e}. Falling back to mock.")
@@ -285,25 +443,28 @@ if generate_btn:
         preview_area.code(article_text[:3000], language="markdown")
         if save_path:
             try:
-                with open(save_path, "w", encoding="utf-8") as fh:
-                    fh.write(article_text)
-                append_log(f"[success] Saved generated article to {save_path}")
+                if save_article(save_path, article_text):
+                    append_log(f"[success] Saved generated article to {save_path}")
+                else:
+                    append_log(f"[info] {save_path} already holds this article; skipped write.")
             except Exception as e:
                 append_log(f"[error] Could not save file: {e}")
     except Exception as e:
         append_log(f"[error] Generation failed: {e}")
 
-if post_btn:
+def handle_publish(linkedin_key: str, org_id_override: str, dry_run: bool):
     append_log("[info] Publishing started...")
     article_to_post = st.session_state.get("generated_article", "")
     if not article_to_post:
         append_log("[warn] No generated article found. Generate first.")
     else:
         # ensure linkedin_key in session
-        st.session_state.linkedin_key = linkedin_key or st.session_state.get("linkedin_key", "")
+        remember_linkedin_key(linkedin_key)
         if not st.session_state.linkedin_key:
             append_log("[error] LinkedIn API key missing. Provide token in API Keys field.")
         else:
+            import requests
+
             try:
                 if BACKEND_MODULE and hasattr(linkedin_poster_core, "post_to_linkedin"):
                     append_log("[info] Using external backend module for posting.")
@@ -312,17 +473,14 @@ if post_btn:
                     except TypeError:
                         response = linkedin_poster_core.post_to_linkedin(article_to_post, org_id=org_id_override or None)
                     append_log("[success] Published using backend module. Response (truncated):")
-                    append_log(json.dumps(response)[:1000])
+                    append_log(dump_truncated(response, 1000))
                     st.success("Published to LinkedIn (backend module).")
                 else:
                     # Build payload with auto org detection
-                    headers = {"Authorization": f"Bearer {st.session_state.linkedin_key}", "X-Restli-Protocol-Version": "2.0.0"}
                     org_id = org_id_override
                     if not org_id:
                         try:
-                            org_id = get_linkedin_org_id(headers)
-                            if not org_id:
-                                raise RuntimeError("No organization found for token.")
+                            org_id = get_linkedin_org_id(st.session_state.linkedin_key)
                             append_log(f"[info] Auto-detected org id: {org_id}")
                         except Exception as e:
                             append_log(f"[error] Could not auto-detect org id: {e}")
@@ -331,13 +489,13 @@ if post_btn:
                     payload = build_ugc_payload(org_id, article_to_post)
                     if dry_run:
                         append_log("[dry-run] Dry run enabled. Payload preview (truncated):")
-                        append_log(json.dumps(payload)[:1200])
+                        append_log(dump_truncated(payload, 1200))
                         st.success("Dry-run: payload prepared (not posted)")
                     else:
                         append_log("[info] Sending post to LinkedIn API.")
                         resp = post_to_linkedin_api(payload, st.session_state.linkedin_key)
                         append_log("[success] Posted to LinkedIn. Response (truncated):")
-                        append_log(json.dumps(resp)[:1000])
+                        append_log(dump_truncated(resp, 1000))
                         st.success("Published to LinkedIn.")
             except requests.HTTPError as he:
                 body = getattr(he.response, "text", "")
@@ -345,10 +503,88 @@ if post_btn:
             except Exception as e:
                 append_log(f"[error] Publishing failed: {e}")
 
-# Display full article in an expander for copy/edit
-if st.session_state.get("generated_article"):
-    with st.expander("Full generated article"):
-        st.text_area("Article (editable)", value=st.session_state.generated_article, height=400)
+# ---------- Workspace ----------
+
+# Everything interactive lives in one fragment, so widget changes and button clicks
+# rerun only this block instead of the whole page (header, footer, page config).
+@st.fragment
+def workspace():
+    global preview_area, log_area
+
+    left_col, right_col = st.columns([1, 2])
+
+    with left_col:
+        # Generation inputs only rerun the app when the form is submitted.
+        with st.form("settings", clear_on_submit=False):
+            st.header("Article settings")
+
+            prompt = st.text_area(
+                "Article prompt",
+                value=(
+                    "Generate a professional and engaging article about the benefits of adopting cloud-native "
+                    "technologies for enterprise businesses. The article should be approximately 500 words, "
+                    "include a strong introduction and conclusion, and focus on scalability, cost efficiency, "
+                    "innovation, and developer experience."
+                ),
+                height=180,
+            )
+
+            model = st.selectbox("Model", options=[DEFAULT_MODEL, "gemini-1.0-mini"], index=0)
+
+            st.subheader("API Keys (session only)")
+            st.markdown("Enter your API keys below. Keys are kept only in this session and are not saved to disk.")
+            gemini_key = st.text_input("Gemini API Key", type="password", placeholder="Paste your GEMINI_API_KEY here (session only)")
+
+            st.subheader("Output options")
+            save_path = st.text_input("Save generated article to file (optional)", value="article.txt")
+
+            generate_btn = st.form_submit_button("Generate Article", use_container_width=True)
+            regenerate_btn = st.form_submit_button("Regenerate (bypass cache)", use_container_width=True)
+
+        # Publishing inputs stay live so the Publish button reflects them without resubmitting.
+        st.subheader("LinkedIn settings")
+        org_id_override = st.text_input("Organization ID (optional)", help="Numeric org id overrides auto-detection")
+        linkedin_key = st.text_input("LinkedIn API Key (Bearer token)", type="password", placeholder="Paste your LINKEDIN_API_KEY here (session only)")
+        dry_run = st.checkbox("Dry run (do not post to LinkedIn)", value=True)
+        if linkedin_key:
+            # Only users who intend to publish pay for importing requests and the handshake.
+            start_linkedin_warmup()
+
+        st.markdown("---")
+        st.caption("Backend status:")
+        if BACKEND_MODULE:
+            st.success("Found linkedin_poster_core.py — will try to use it.")
+        else:
+            st.info("No backend module found — app will use its internal generator/poster or mocks.")
+
+        publish_disabled = dry_run or (not linkedin_key)
+        post_btn = st.button("Publish to LinkedIn", use_container_width=True, disabled=publish_disabled)
+
+    with right_col:
+        st.header("Preview")
+        preview_area = st.empty()
+        st.markdown("---")
+        st.header("Activity / Logs")
+        log_area = st.empty()
+
+    if regenerate_btn:
+        # Drop only this prompt/model entry; a bare clear() would wipe every session's articles.
+        # Arguments must match the positional call in generate_article_with_gemini.
+        _cached_generate.clear(prompt, model, 2, GEMINI_DEADLINE_SECONDS)
+        append_log("[info] Cached article for this prompt cleared.")
+
+    if generate_btn or regenerate_btn:
+        handle_generate(prompt, model, gemini_key, linkedin_key, org_id_override, save_path)
+
+    if post_btn:
+        handle_publish(linkedin_key, org_id_override, dry_run)
+
+    # Display full article in an expander for copy/edit
+    if st.session_state.get("generated_article"):
+        with st.expander("Full generated article"):
+            st.text_area("Article (editable)", value=st.session_state.generated_article, height=400)
+
+workspace()
 
 # Footer notes
 st.markdown("---")